@@ -1,8 +1,17 @@
 from pathlib import Path
 from curl_cffi import requests
+from curl_cffi.requests import AsyncSession
 import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import random
 import re
-from time import sleep
+import tempfile
+import zlib
+from time import time
 
 # Optional for pretty CLI output
 try:
@@ -13,6 +22,21 @@ except ImportError:
         __builtins__.print(*args, **kwargs)
     Progress = None
 
+# Optional faster JSON parser
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+CACHE_DIR = Path.home() / '.cache' / 'subf'
+CACHE_TTL = 24 * 60 * 60  # seconds
+
+# crt.sh is often overloaded; transient failures are retried with jittered backoff
+MAX_RETRIES = 3
+RETRY_STATUSES = (502, 503, 504)
+
+DOMAIN_RE = re.compile(r'\A(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}\Z', re.ASCII)
+
 def is_valid_domain(domain: str) -> bool:
     """
     Validates if the given string is a proper domain name using regex.
@@ -23,33 +47,187 @@ def is_valid_domain(domain: str) -> bool:
     Returns:
         bool: True if domain is valid, else False.
     """
-    return re.match(r'^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}$', domain) is not None
+    return DOMAIN_RE.match(domain) is not None
+
+
+def _cache_path(query: str) -> Path:
+    """
+    Returns the cache file used for a crt.sh query.
+
+    Args:
+        query (str): Value of the crt.sh "q" parameter
+
+    Returns:
+        Path: Location of the gzipped response body
+    """
+    key = hashlib.sha256(query.encode('utf-8')).hexdigest()
+    return CACHE_DIR / f'{key}.json.gz'
+
+
+def _read_cache(query: str):
+    """
+    Loads a cached crt.sh response if it is younger than CACHE_TTL.
+
+    Args:
+        query (str): Value of the crt.sh "q" parameter
+
+    Returns:
+        list | None: Cached JSON data, or None if missing, stale or unreadable.
+    """
+    path = _cache_path(query)
+    try:
+        if time() - path.stat().st_mtime > CACHE_TTL:
+            return None
+        return json_loads(gzip.decompress(path.read_bytes()))
+    except (OSError, ValueError, EOFError, zlib.error):
+        return None
+
 
+def _write_cache(query: str, content: bytes):
+    """
+    Stores a raw crt.sh response body in the cache, gzipped.
 
-def get_crt(subdomain: str):
+    Args:
+        query (str): Value of the crt.sh "q" parameter
+        content (bytes): Response body
+    """
+    path = _cache_path(query)
+    tmp_path = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so an interrupted write never leaves a truncated entry
+        with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            f.write(gzip.compress(content))
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f'[yellow]Could not write cache: {e}[/yellow]')
+        if tmp_path:
+            Path(tmp_path).unlink(missing_ok=True)
+
+
+async def _fetch_query(session: AsyncSession, query: str, use_cache: bool = True, refresh: bool = False):
+    """
+    Runs a single crt.sh query, answering from the local cache when possible.
+    Timeouts, network errors and 502/503/504 responses are retried with backoff.
+
+    Args:
+        session (AsyncSession): Session used to send the request
+        query (str): Value of the crt.sh "q" parameter (e.g., "%25.example.com")
+        use_cache (bool): Read from and write to the on-disk cache
+        refresh (bool): Skip cached entries but still store the fresh response
+
+    Returns:
+        list | None: Parsed JSON data if found, else None.
+    """
+    if use_cache and not refresh:
+        datas = _read_cache(query)
+        if datas:
+            return datas
+
+    url = f'https://crt.sh/?q={query}&output=json'
+    for attempt in range(MAX_RETRIES):
+        if attempt:
+            await asyncio.sleep(2 ** (attempt - 1) + random.random())
+        retrying = attempt < MAX_RETRIES - 1
+        try:
+            req = await session.get(url, impersonate='chrome', timeout=60)
+            if req.status_code in RETRY_STATUSES:
+                if retrying:
+                    print(f'[yellow]crt.sh returned {req.status_code}, retrying...[/yellow]')
+                else:
+                    print(f'[red]crt.sh returned {req.status_code}, giving up after {MAX_RETRIES} attempts[/red]')
+                continue
+            if req.status_code == 200:
+                datas = json_loads(req.content)
+                if datas:
+                    if use_cache:
+                        _write_cache(query, req.content)
+                    return datas
+        except requests.Timeout:
+            if retrying:
+                print('[yellow]Request timed out, retrying...[/yellow]')
+            else:
+                print(f'[red]Request timed out, giving up after {MAX_RETRIES} attempts[/red]')
+            continue
+        except requests.RequestsError as e:
+            if retrying:
+                print(f'[yellow]Error: {e}, retrying...[/yellow]')
+            else:
+                print(f'[red]Error: {e}, giving up after {MAX_RETRIES} attempts[/red]')
+            continue
+        except Exception as e:
+            print(f'[red]Error: {e}[/red]')
+        break
+
+    return None
+
+
+async def get_crt_async(subdomain: str, session: AsyncSession = None, use_cache: bool = True,
+                        refresh: bool = False):
     """
     Fetches certificate data for a domain from crt.sh.
 
+    crt.sh returns different rows for "example.com" and "%.example.com",
+    so both queries are sent concurrently and their results merged.
+
     Args:
         subdomain (str): The domain to search for (e.g., "example.com")
+        session (AsyncSession): Session to reuse; a new one is opened if omitted
+        use_cache (bool): Read from and write to the on-disk cache
+        refresh (bool): Skip cached entries but still store the fresh response
 
     Returns:
         list | None: Parsed JSON data if found, else None.
     """
-    url = f'https://crt.sh/?q={subdomain}&output=json'
-    s = requests.Session()
-    try:
-        req = s.get(url, impersonate='chrome', timeout=60)
-        if req.status_code == 200:
-            datas = req.json()
-            if datas:
-                return datas
-    except requests.Timeout:
-        print('[red]Request timed out[/red]')
-    except Exception as e:
-        print(f'[red]Error: {e}[/red]')
+    if not is_valid_domain(subdomain):
+        return None
 
-    return None
+    if session is None:
+        async with AsyncSession() as s:
+            return await get_crt_async(subdomain, s, use_cache, refresh)
+
+    results = await asyncio.gather(
+        _fetch_query(session, subdomain, use_cache, refresh),
+        _fetch_query(session, f'%25.{subdomain}', use_cache, refresh),
+    )
+
+    datas = [row for rows in results if rows for row in rows]
+    return datas or None
+
+
+async def fetch_many(domains: list, use_cache: bool = True, refresh: bool = False):
+    """
+    Fetches certificate data for several domains concurrently.
+    All queries share one session so its connections are kept alive and reused.
+
+    Args:
+        domains (list): Domains to search for
+        use_cache (bool): Read from and write to the on-disk cache
+        refresh (bool): Skip cached entries but still store the fresh response
+
+    Returns:
+        list: One result per domain, in the same order (None when nothing was found).
+    """
+    async with AsyncSession() as s:
+        return await asyncio.gather(*[get_crt_async(domain, s, use_cache, refresh) for domain in domains])
+
+
+def get_crt(subdomain: str, use_cache: bool = True, refresh: bool = False):
+    """
+    Synchronous wrapper around get_crt_async.
+
+    Args:
+        subdomain (str): The domain to search for (e.g., "example.com")
+        use_cache (bool): Read from and write to the on-disk cache
+        refresh (bool): Skip cached entries but still store the fresh response
+
+    Returns:
+        list | None: Parsed JSON data if found, else None.
+    """
+    if not is_valid_domain(subdomain):
+        return None
+    return asyncio.run(get_crt_async(subdomain, use_cache=use_cache, refresh=refresh))
 
 
 def clean_subd(subdomain: str):
@@ -64,55 +242,59 @@ def clean_subd(subdomain: str):
     """
     if not subdomain:
         return ''
-    subdomain = subdomain.strip()
-    if subdomain.startswith('*'):
-        subdomain = subdomain[2:]
-    if subdomain.startswith('www.'):
-        subdomain = subdomain[4:]
-    return subdomain
+    return subdomain.strip().removeprefix('*.').removeprefix('www.')
 
 
-def process_data(datas: list):
+def process_data(datas):
     """
     Processes the JSON data from crt.sh into a clean set of unique subdomains.
 
     Args:
-        datas (list): JSON list of certificate records
+        datas (iterable): JSON certificate records
 
     Returns:
         set: Unique subdomains
     """
     subdomains = set()
+    add = subdomains.add
+    update = subdomains.update
+    clean = clean_subd
     for data in datas:
-        common_name = clean_subd(data.get('common_name', ''))
-        if common_name:
-            subdomains.add(common_name)
-
+        add(clean(data.get('common_name', '')))
         name_value = data.get('name_value', '')
-        if '\n' in name_value:
-            names = name_value.split('\n')
-            for name in names:
-                cleaned = clean_subd(name)
-                if cleaned:
-                    subdomains.add(cleaned)
-        else:
-            cleaned = clean_subd(name_value)
-            if cleaned:
-                subdomains.add(cleaned)
+        if name_value:
+            update(map(clean, name_value.split('\n')))
+    subdomains.discard('')
     return subdomains
 
 
-def write_subs_file(file_to_save: str, subdomains: list):
+def _reverse_labels(subdomain: str):
+    """
+    Sort key that orders subdomains by their parent domains (e.g., "a.b.com" -> ["com", "b", "a"]).
+    """
+    return subdomain.split('.')[::-1]
+
+
+def write_subs_file(file_to_save: str, subdomains: list, sort: str = 'lex'):
     """
     Writes subdomains to a text file, one per line.
 
     Args:
         file_to_save (str): Full path to save the file
         subdomains (list): List of cleaned subdomains
+        sort (str): "lex" for plain alphabetical order, "hierarchical" to group
+            by parent domain, or "none" to keep the original order
     """
-    with open(file_to_save, 'w', encoding='utf-8') as f:
-        for subdomain in sorted(subdomains):
-            f.write(subdomain + '\n')
+    if sort == 'hierarchical':
+        subdomains = sorted(subdomains, key=_reverse_labels)
+    elif sort == 'lex':
+        subdomains = sorted(subdomains)
+
+    lines = '\n'.join(subdomains)
+    if lines:
+        lines += '\n'
+    with open(file_to_save, 'wb', buffering=1 << 20) as f:
+        f.write(lines.encode('utf-8'))
 
 
 def main():
@@ -127,6 +309,12 @@ def main():
     parser.add_argument('domain', help='The domain to search for subdomains (e.g., example.com)')
     parser.add_argument('-o', '--output', help='Output file name', default=None)
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help='Neither read nor write cached crt.sh responses')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached crt.sh responses, fetch fresh data and update the cache')
+    parser.add_argument('--sort', choices=['none', 'lex', 'hierarchical'], default='lex',
+                        help='Output order: alphabetical (default), grouped by parent domain, or unsorted')
 
     args = parser.parse_args()
     domain = args.domain
@@ -137,19 +325,18 @@ def main():
         return
 
     # Determine output file name
-    output_file = args.output or f'{domain.replace(".com", "")}-subdomains.txt'
+    output_file = args.output or f'{domain.rsplit(".", 1)[0] or domain}-subdomains.txt'
     save_path = Path.cwd() / output_file
 
     # Use fancy progress bar if available
     if Progress:
         with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
             task = progress.add_task("Fetching subdomains...", total=None)
-            data = get_crt(domain)
-            progress.update(task, description="Processing data...")
-            sleep(0.5)
+            data = asyncio.run(get_crt_async(domain, use_cache=args.use_cache, refresh=args.refresh))
             if data:
+                progress.update(task, description="Processing data...")
                 subdomains = process_data(data)
-                write_subs_file(save_path, subdomains)
+                write_subs_file(save_path, subdomains, args.sort)
                 progress.update(task, description="Done!")
                 print(f"[green]✔ Found {len(subdomains)} subdomains. Saved to [bold]{save_path}[/bold][/green]")
             else:
@@ -157,10 +344,10 @@ def main():
     else:
         # Fallback plain output
         print(f"Fetching subdomains for {domain}...")
-        data = get_crt(domain)
+        data = asyncio.run(get_crt_async(domain, use_cache=args.use_cache, refresh=args.refresh))
         if data:
             subdomains = process_data(data)
-            write_subs_file(save_path, subdomains)
+            write_subs_file(save_path, subdomains, args.sort)
             print(f"Found {len(subdomains)} subdomains. Saved to {save_path}")
         else:
             print("No results found.")